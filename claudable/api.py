@@ -1,38 +1,75 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import base64
+import hashlib
+import logging
 import os
+import re
+import orjson
 from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import asyncio
+import time
 import uuid
+import weakref
 from datetime import datetime
 from pathlib import Path
-from src.mcp_tools.web import async_web_search
+from urllib.parse import parse_qs
+from src.mcp_tools.web import async_web_search, close_browser
 from database import ChatDatabase
-import tiktoken
 
 # Claude Agent SDK imports
-from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions
+from claude_agent_sdk import (
+    ClaudeSDKClient,
+    ClaudeAgentOptions,
+    AssistantMessage,
+    ResultMessage,
+    TextBlock,
+)
 
-# For internal API calls
-import aiohttp
+logger = logging.getLogger(__name__)
 
 # Session management
 class SessionData:
-    def __init__(self, client: ClaudeSDKClient, options: ClaudeAgentOptions, created_at: datetime):
+    __slots__ = ("client", "options", "created_at", "status")
+
+    def __init__(self, client: ClaudeSDKClient, options: ClaudeAgentOptions, created_at: float):
         self.client = client
         self.options = options
         self.created_at = created_at
-        self.last_activity = datetime.now()
         self.status = "ready"
-        self.event_queue = asyncio.Queue()
 
 # In-memory session store (use Redis in production)
 session_store: Dict[str, SessionData] = {}
 
+# Session IDs are str(uuid4()); a regex match is much cheaper than parsing with uuid.UUID
+_UUID_RE = re.compile(r"\A[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z", re.I)
+
+# Last activity per session as epoch seconds; touched on every session call, so kept apart from SessionData
+_last_activity: Dict[str, float] = {}
+
+# Each session connect spawns a Claude CLI subprocess; cap how many start at once
+SESSION_CREATE_LIMIT = 4
+_session_create_sem = asyncio.Semaphore(SESSION_CREATE_LIMIT)
+
+# Serializes session lookup/creation per chat so concurrent messages share one session.
+# Weak values: a lock lives only while a request holds or awaits it.
+_chat_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _chat_session_lock(chat_uuid: str) -> asyncio.Lock:
+    """Return the lock guarding session setup for a chat, creating it if needed"""
+    lock = _chat_session_locks.get(chat_uuid)
+    if lock is None:
+        lock = _chat_session_locks[chat_uuid] = asyncio.Lock()
+    return lock
+
+
 # Pydantic models for API requests and responses
 class CreateSessionRequest(BaseModel):
     profile: Optional[str] = "default"
@@ -66,20 +103,154 @@ Right now, you've provided:
 - ✅ the output format
 - ❌ but **not the query Scout is supposed to interpret**"""
 
-app = FastAPI(title="Claude API", version="1.0.0")
+# Dummy reply streamed by /sample: a per-request head filled in with (message, mode, model)
+# followed by a fixed tail whose SSE frames are built once below
+SAMPLE_HEAD_TEMPLATE = """Hello! I received your message: "%s"
+
+You selected:
+- Mode: %s
+- Model: %s
+
+"""
+SAMPLE_TAIL = """This is a dummy streaming response to demonstrate the streaming functionality.
+In the future, this will be replaced with actual LLM responses from Claude or Qwen.
+
+The system is working correctly and ready for integration with real language models.
+Each word is being streamed token by token to simulate real LLM behavior.
+This provides a smooth user experience with progressive text rendering.
+
+Thank you for testing the Claudable interface!"""
+
+# Number of words coalesced into one SSE frame when replaying a finished response
+SSE_BATCH_WORDS = 8
+
+# Live delta frames arriving within this window (or until this many bytes) are sent as one frame
+SSE_COALESCE_SECONDS = 0.02
+SSE_COALESCE_BYTES = 16 * 1024
+
+# SSE framing, pre-encoded so stream generators yield bytes Starlette can send as-is
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+SSE_DONE = b"data: [DONE]\n\n"
+
+# Comment frame sent when a stream is idle this long, so proxies don't time it out
+SSE_PING = b": ping\n\n"
+SSE_PING_SECONDS = 15
+
+# Stop browsers and reverse proxies (nginx) from caching or buffering event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers keep versioned assets (?v=...) for a year
+    and makes them revalidate everything else through the ETag
+    """
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            versioned = "v" in parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable" if versioned else "no-cache"
+        return response
+
+
 db = ChatDatabase()
 
+# Fire-and-forget writes (message saves) are applied in order by one background task
+# on a dedicated thread, so they never hold up a request or its stream
+_write_queue: asyncio.Queue = asyncio.Queue()
+_writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+
+async def _db_writer():
+    """
+    Drain _write_queue, running each ChatDatabase write on the writer thread in FIFO order
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        fn, args = await _write_queue.get()
+        try:
+            await loop.run_in_executor(_writer_executor, fn, *args)
+        except Exception:
+            logger.exception("Background database write %s failed", fn.__name__)
+        finally:
+            _write_queue.task_done()
+
+
+def _db_write(fn, *args):
+    """
+    Queue a ChatDatabase write for the background writer without waiting for it
+    """
+    _write_queue.put_nowait((fn, args))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    writer = asyncio.create_task(_db_writer())
+    yield
+    # Flush queued writes before shutting down
+    await _write_queue.join()
+    writer.cancel()
+    # Close the shared Playwright browser used by web search
+    await close_browser()
+    # Close the shared LM HTTP session used by the search agent
+    await close_lm()
+
+
+app = FastAPI(title="Claude API", version="1.0.0", lifespan=lifespan)
+
+
+async def _db(fn, *args, **kwargs):
+    """
+    Run a blocking ChatDatabase call in a worker thread so SQLite I/O doesn't stall the event loop
+    """
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+def _json_response(payload) -> Response:
+    """
+    Serialize payload with orjson into a ready-made JSON response
+    """
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
 # Mount static files directory
 static_dir = Path(__file__).parent / "static"
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+app.mount("/static", CachedStaticFiles(directory=str(static_dir)), name="static")
+
+# HTML shells are read once at startup and served from memory
+INDEX_HTML = (Path(__file__).parent / "index.html").read_bytes()
+CHAT_HTML = (Path(__file__).parent / "chat.html").read_bytes()
+INDEX_ETAG = f'"{hashlib.md5(INDEX_HTML).hexdigest()}"'
+CHAT_ETAG = f'"{hashlib.md5(CHAT_HTML).hexdigest()}"'
+
+
+def _html_response(request: Request, body: bytes, etag: str) -> Response:
+    """
+    Serve an in-memory HTML page; browsers revalidate on every load and get a 304 when their copy is current
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/html", headers=headers)
 
-# Add CORS middleware to allow frontend to connect
+# Compress HTML/JSON/static responses; SSE streams are left uncompressed by Starlette
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+# Add CORS middleware to allow frontend to connect; the pages served by this app are
+# same-origin, so only the dev servers need listing. Preflights are cached for a day.
+CORS_ORIGINS = [
+    "http://localhost:8000",
+    "http://127.0.0.1:8000",
+    "http://localhost:7860",
+    "http://127.0.0.1:7860",
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type"],
+    max_age=86400,
 )
 
 
@@ -101,16 +272,11 @@ class ClaudeRequest(BaseModel):
 
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """
     Serve the main HTML page
     """
-    html_path = Path(__file__).parent / "index.html"
-    response = FileResponse(html_path)
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    return response
+    return _html_response(request, INDEX_HTML, INDEX_ETAG)
 
 
 @app.get("/health")
@@ -126,12 +292,12 @@ async def health_check():
     except ImportError:
         claude_available = False
 
-    return {
+    return _json_response({
         "status": "healthy",
         "message": "Claude API is running",
         "claude_available": claude_available,
         "session_count": len(session_store)
-    }
+    })
 
 
 @app.post("/rbi")
@@ -139,7 +305,127 @@ async def claude_message(request: MessageRequest):
     pass
 
 
-from src.agents.agent_search import search_agent
+from src.agents.agent_search import close_lm, search_agent
+
+
+def _word_frames(words) -> list[bytes]:
+    """
+    Encode words as SSE frames of SSE_BATCH_WORDS words each, with newlines escaped
+    """
+    return [
+        SSE_PREFIX + ' '.join(words[start:start + SSE_BATCH_WORDS]).encode().replace(b"\n", b"\\n") + b" " + SSE_SUFFIX
+        for start in range(0, len(words), SSE_BATCH_WORDS)
+    ]
+
+
+async def _stream_words(words, tail_frames=(SSE_DONE,)):
+    """
+    Stream words as SSE frames of SSE_BATCH_WORDS words each, followed by tail_frames (the [DONE] marker by default)
+    """
+    for frame in _word_frames(words):
+        yield frame
+    for frame in tail_frames:
+        yield frame
+
+
+# The fixed part of the /sample reply, already framed and terminated with [DONE]
+SAMPLE_TAIL_FRAMES = (*_word_frames(SAMPLE_TAIL.split(' ')), SSE_DONE)
+
+
+def _sse_delta(buf: bytearray, text: str) -> bytes:
+    """
+    Append text to buf and return an SSE frame carrying just that delta, with newlines escaped
+    """
+    frag = (b" " if buf else b"") + text.encode()
+    buf.extend(frag)
+    return SSE_PREFIX + frag.replace(b"\n", b"\\n") + SSE_SUFFIX
+
+
+async def _with_keepalive(frames):
+    """
+    Pass frames through, sending SSE_PING whenever the source stays silent for SSE_PING_SECONDS
+    """
+    frames = frames.__aiter__()
+    next_frame = None
+    try:
+        while True:
+            if next_frame is None:
+                next_frame = asyncio.ensure_future(frames.__anext__())
+            done, _ = await asyncio.wait((next_frame,), timeout=SSE_PING_SECONDS)
+            if not done:
+                yield SSE_PING
+                continue
+            try:
+                frame = next_frame.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                next_frame = None
+            yield frame
+    finally:
+        if next_frame is not None:
+            next_frame.cancel()
+
+
+def _sse_response(frames, keepalive: bool = True) -> StreamingResponse:
+    """
+    Wrap an async iterator of SSE frames in a StreamingResponse with SSE_HEADERS, adding idle pings unless keepalive is off
+    """
+    if keepalive:
+        frames = _with_keepalive(frames)
+    return StreamingResponse(frames, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+async def _coalesce_deltas(frames):
+    """
+    Merge delta frames that arrive within SSE_COALESCE_SECONDS of the first buffered one into a single
+    frame, flushing early at SSE_COALESCE_BYTES; the [DONE] marker is always sent on its own
+    """
+    loop = asyncio.get_running_loop()
+    frames = frames.__aiter__()
+    batch = []
+    size = 0
+    deadline = 0.0
+    next_frame = None
+    try:
+        while True:
+            if next_frame is None:
+                # Keep one pending read so a flush timeout never cancels the source generator
+                next_frame = asyncio.ensure_future(frames.__anext__())
+            if batch:
+                done, _ = await asyncio.wait((next_frame,), timeout=max(0.0, deadline - loop.time()))
+                if not done:
+                    yield SSE_PREFIX + b"".join(batch) + SSE_SUFFIX
+                    batch, size = [], 0
+                    continue
+            try:
+                frame = await next_frame
+            except StopAsyncIteration:
+                break
+            finally:
+                next_frame = None
+
+            if frame == SSE_DONE:
+                if batch:
+                    yield SSE_PREFIX + b"".join(batch) + SSE_SUFFIX
+                    batch, size = [], 0
+                yield frame
+                continue
+
+            if not batch:
+                deadline = loop.time() + SSE_COALESCE_SECONDS
+            payload = frame[len(SSE_PREFIX):-len(SSE_SUFFIX)]
+            batch.append(payload)
+            size += len(payload)
+            if size >= SSE_COALESCE_BYTES:
+                yield SSE_PREFIX + b"".join(batch) + SSE_SUFFIX
+                batch, size = [], 0
+
+        if batch:
+            yield SSE_PREFIX + b"".join(batch) + SSE_SUFFIX
+    finally:
+        if next_frame is not None:
+            next_frame.cancel()
 
 
 @app.post("/claude")
@@ -149,14 +435,10 @@ async def claude_search_endpoint(request: ClaudeRequest):
     """
     async def generate_stream():
         response = await search_agent(request.message)
-        words = response.split(' ')
-        for word in words:
-            yield f"data: {word} \n\n"
-            await asyncio.sleep(0.05)
+        async for frame in _stream_words(response.split(' ')):
+            yield frame
 
-        yield "data: [DONE]\n\n"
-
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+    return _sse_response(generate_stream())
 
 @app.post("/sample")
 async def sample(request: ClaudeRequest):
@@ -164,32 +446,11 @@ async def sample(request: ClaudeRequest):
     Claude streaming endpoint that mimics LLM token-by-token response
     Later this will be replaced with actual LLM integration
     """
-    async def generate_stream():
-        # Dummy response that will be streamed token by token
-        dummy_response = f"""Hello! I received your message: "{request.message}"
-
-You selected:
-- Mode: {request.option1}
-- Model: {request.option2}
-
-This is a dummy streaming response to demonstrate the streaming functionality.
-In the future, this will be replaced with actual LLM responses from Claude or Qwen.
-
-The system is working correctly and ready for integration with real language models.
-Each word is being streamed token by token to simulate real LLM behavior.
-This provides a smooth user experience with progressive text rendering.
-
-Thank you for testing the Claudable interface!"""
-
-        # Split into words and stream with delay
-        words = dummy_response.split(' ')
-        for word in words:
-            yield f"data: {word} \n\n"
-            await asyncio.sleep(0.05)  # Simulate processing delay
+    # Only the head depends on the request; the tail frames are precomputed
+    head = SAMPLE_HEAD_TEMPLATE % (request.message, request.option1, request.option2)
 
-        yield "data: [DONE]\n\n"
-
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+    # Nothing to wait on here, so no keepalive pings are needed
+    return _sse_response(_stream_words(head.split(' '), SAMPLE_TAIL_FRAMES), keepalive=False)
 
 
 @app.post("/web")
@@ -199,7 +460,7 @@ async def web_search_endpoint(request: WebSearchRequest):
     """
     try:
         results = await async_web_search(request.query, request.max_results)
-        return {"query": request.query, "results": results}
+        return _json_response({"query": request.query, "results": results})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -217,12 +478,12 @@ async def create_chat(request: ClaudeRequest):
         title = db.generate_title_from_message(request.message)
 
         # Create chat session
-        chat_uuid = db.create_chat(title=title)
+        chat_uuid = await _db(db.create_chat, title=title)
 
         # Add user message
-        db.add_message(chat_uuid, "user", request.message)
+        await _db(db.add_message, chat_uuid, "user", request.message)
 
-        return JSONResponse({
+        return _json_response({
             "chat_uuid": chat_uuid,
             "title": title
         })
@@ -231,21 +492,15 @@ async def create_chat(request: ClaudeRequest):
 
 
 @app.get("/chat/{chat_uuid}")
-async def serve_chat_page(chat_uuid: str):
+async def serve_chat_page(chat_uuid: str, request: Request):
     """
     Serve the chat page for a specific chat session
     """
     # Verify chat exists
-    chat = db.get_chat(chat_uuid)
-    if not chat:
+    if not await _db(db.chat_exists, chat_uuid):
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    html_path = Path(__file__).parent / "chat.html"
-    response = FileResponse(html_path)
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    return response
+    return _html_response(request, CHAT_HTML, CHAT_ETAG)
 
 
 @app.get("/api/chats")
@@ -254,8 +509,8 @@ async def get_all_chats():
     Get all chat sessions
     """
     try:
-        chats = db.get_all_chats()
-        return JSONResponse({"chats": chats})
+        chats = await _db(db.get_all_chats)
+        return _json_response({"chats": chats})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -266,15 +521,17 @@ async def get_chat_messages(chat_uuid: str):
     Get all messages for a specific chat
     """
     try:
-        chat = db.get_chat(chat_uuid)
-        if not chat:
+        found = await _db(db.get_chat_with_messages, chat_uuid)
+        if found is None:
             raise HTTPException(status_code=404, detail="Chat not found")
 
-        messages = db.get_messages(chat_uuid)
-        return JSONResponse({
+        chat, messages = found
+        return _json_response({
             "chat": chat,
             "messages": messages
         })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -285,16 +542,14 @@ async def send_message_to_chat(chat_uuid: str, request: ClaudeRequest):
     Send a message to an existing chat and stream the response
     """
     # Verify chat exists
-    chat = db.get_chat(chat_uuid)
-    if not chat:
+    if not await _db(db.chat_exists, chat_uuid):
         raise HTTPException(status_code=404, detail="Chat not found")
 
     # Always add the user message regardless of duplicates
-    db.add_message(chat_uuid, "user", request.message)
-    print(f"[CHAT {chat_uuid}] Added user message: {request.message}")
-    message_added = True
+    _db_write(db.add_message, chat_uuid, "user", request.message)
+    logger.info("[CHAT %s] User message queued for saving: %s", chat_uuid, request.message)
 
-    print(f"[CHAT {chat_uuid}] Mode: {request.option1}, Model: {request.option2}")
+    logger.info("[CHAT %s] Mode: %s, Model: %s", chat_uuid, request.option1, request.option2)
 
     # Check if this is a Claude "Code" mode request
     # Based on the UI, "code" is the value for Claude mode, "scout" for search agent
@@ -310,293 +565,150 @@ async def handle_scout_request(chat_uuid: str, request: ClaudeRequest):
     """
     Handle Scout requests using existing search_agent
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
     async def generate_stream():
-        logger.info(f"[SCOUT REQUEST] Starting search_agent for chat {chat_uuid}")
-        logger.info(f"[SCOUT REQUEST] Input prompt: {request.message}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        logger.info("[SCOUT REQUEST] Starting search_agent for chat %s", chat_uuid)
+        logger.info("[SCOUT REQUEST] Input prompt: %s", request.message)
 
         response = await search_agent(request.message)
-        logger.info(f"[SCOUT RESPONSE] Received response from search_agent: {repr(response[:100])}...")
+        logger.info("[SCOUT RESPONSE] Received response from search_agent: %r...", response[:100])
 
         # Split response into words/tokens for streaming
         words = response.split(' ')
 
-        # Stream each word/token
-        accumulated_response = []
-        for word in words:
-            accumulated_response.append(word)
-            # Send accumulated response so far
-            current_response = ' '.join(accumulated_response)
+        # Stream batches of words so the UI re-renders once per frame, not per word.
+        # Each frame carries only its own words; the client appends them to its buffer.
+        for start in range(0, len(words), SSE_BATCH_WORDS):
+            batch = words[start:start + SSE_BATCH_WORDS]
             # Escape newlines for SSE format (use a placeholder)
-            escaped_response = current_response.replace('\n', '\\n')
-            logger.debug(f"[SCOUT STREAM] Yielding word: {repr(word)}")
-            yield f"data: {escaped_response}\n\n"
-            await asyncio.sleep(0.05)
+            delta = ' '.join(batch).replace('\n', '\\n')
+            if debug:
+                logger.debug("[SCOUT STREAM] Yielding words: %r", batch)
+            yield SSE_PREFIX + delta.encode() + b" " + SSE_SUFFIX
 
-        # Store the complete response
-        complete_response = ' '.join(accumulated_response)
-        logger.info(f"[SCOUT RESPONSE] Complete response for chat {chat_uuid}: {repr(complete_response[:100])}...")
+        # The streamed words re-join to the original response
+        complete_response = response
+        logger.info("[SCOUT RESPONSE] Complete response for chat %s: %r...", chat_uuid, complete_response[:100])
 
         # Save assistant's response to database
-        db.add_message(chat_uuid, "assistant", complete_response.strip())
-        logger.info(f"[CHAT {chat_uuid}] Scout response saved to database")
+        _db_write(db.add_message, chat_uuid, "assistant", complete_response.strip())
+        logger.info("[CHAT %s] Scout response queued for saving", chat_uuid)
+
+        yield SSE_DONE
 
-        yield "data: [DONE]\n\n"
+    return _sse_response(generate_stream())
 
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+
+def _block_text(block: TextBlock) -> str:
+    return block.text
+
+
+# Content block class -> function returning the text to stream for that block.
+# Only text is shown; tool use and thinking blocks are not part of the reply.
+BLOCK_HANDLERS = {
+    TextBlock: _block_text,
+}
+
+
+# Map UI model names to valid Claude CLI model names
+MODEL_NAME_MAP = {
+    "Claude Sonnet 4.5": "sonnet",
+    "Claude Opus 4.5": "opus",
+    "Claude Haiku 4.5": "haiku",
+    "Claude Claude": "claude",  # Direct mapping for 'claude'
+    "sonnet": "sonnet",
+    "opus": "opus",
+    "haiku": "haiku",
+    "claude": "claude"
+}
+
+# Session settings for chats in code mode; only the model varies per chat
+DEV_SESSION_TEMPLATE = {
+    "profile": "dev",
+    "system_prompt": "You are a helpful coding assistant",
+    "allowed_tools": ["Read", "Write", "Edit", "Glob", "Grep"],
+    "permission_mode": "acceptEdits",
+}
 
 
 async def handle_claude_request(chat_uuid: str, request: ClaudeRequest):
     """
     Handle Claude requests using Claude API with session management
     """
-    # Map UI model names to valid Claude CLI model names
-    model_name_mapping = {
-        "Claude Sonnet 4.5": "sonnet",
-        "Claude Opus 4.5": "opus",
-        "Claude Haiku 4.5": "haiku",
-        "Claude Claude": "claude",  # Direct mapping for 'claude'
-        "sonnet": "sonnet",
-        "opus": "opus",
-        "haiku": "haiku",
-        "claude": "claude"
-    }
-
     # Get the mapped model name, defaulting to 'sonnet' if not found
-    mapped_model = model_name_mapping.get(request.option2, "sonnet")
+    mapped_model = MODEL_NAME_MAP.get(request.option2, "sonnet")
 
     # Get or create Claude session ID for this chat
-    claude_session_id = db.get_claude_session_id(chat_uuid)
-
-    if not claude_session_id:
-        # Create a new Claude session
-        from claude_agent_sdk import ClaudeAgentOptions
-        options = ClaudeAgentOptions(
-            # allowed_tools=["Read", "Write", "Edit", "Glob", "Grep"],
-            permission_mode="bypassPermissions",
-        )
-
-        # Create session via the Claude API
-        create_session_data = {
-            "profile": "dev",
-            "system_prompt": "You are a helpful coding assistant",
-            "allowed_tools": ["Read", "Write", "Edit", "Glob", "Grep"],
-            "permission_mode": "acceptEdits",
-            "model": mapped_model  # Use the mapped model name
-        }
-
-        # Create session in our API
-        async with aiohttp.ClientSession() as session:
+    lock = _chat_session_lock(chat_uuid)
+    async with lock:
+        claude_session_id = await _db(db.get_claude_session_id, chat_uuid)
+        session_data = session_store.get(claude_session_id) if claude_session_id else None
+
+        if session_data is None:
+            # Create a new Claude session in-process (also covers ids left over from a previous server run)
+            create_session_request = CreateSessionRequest(**DEV_SESSION_TEMPLATE, model=mapped_model)
             try:
-                async with session.post("http://localhost:8000/sessions", json=create_session_data) as resp:
-                    if resp.status == 200:
-                        session_result = await resp.json()
-                        claude_session_id = session_result["session_id"]
-                        # Store the session ID in the database
-                        db.set_claude_session_id(chat_uuid, claude_session_id)
-                    else:
-                        error_text = await resp.text()
-                        print(f"Failed to create Claude session: {resp.status}, {error_text}")
-                        raise HTTPException(status_code=500, detail="Failed to create Claude session")
+                claude_session_id, session_data = await _create_session(create_session_request)
+                # Store the session ID in the database
+                await _db(db.set_claude_session_id, chat_uuid, claude_session_id)
             except Exception as e:
-                print(f"Error creating Claude session: {e}")
+                logger.exception("[CHAT %s] Error creating Claude session", chat_uuid)
                 raise HTTPException(status_code=500, detail=f"Failed to create Claude session: {str(e)}")
 
     async def generate_stream():
-        import logging
-        logger = logging.getLogger(__name__)
-        
+        debug = logger.isEnabledFor(logging.DEBUG)
+        response_buf = bytearray()
+
         try:
-            logger.info(f"[CLAUDE REQUEST] Sending query to Claude session {claude_session_id} for chat {chat_uuid}")
-            logger.info(f"[CLAUDE REQUEST] Input prompt: {request.message}")
-            
-            # Send the query to Claude via our API
-            query_data = {"prompt": request.message}
-            
-            async with aiohttp.ClientSession() as session:
-                # Send the query
-                async with session.post(f"http://localhost:8000/sessions/{claude_session_id}/query", json=query_data) as query_resp:
-                    if query_resp.status != 200:
-                        error_text = await query_resp.text()
-                        logger.error(f"Failed to send query to Claude: {query_resp.status}, {error_text}")
-                        yield f"data: Error: Failed to send query to Claude\n\n"
-                        yield "data: [DONE]\n\n"
-                        return
-                    else:
-                        logger.info(f"Query sent successfully to Claude session {claude_session_id}")
-
-            # Stream the response from Claude events endpoint
-            logger.info(f"[CLAUDE STREAM] Starting to stream response from session {claude_session_id}")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"http://localhost:8000/sessions/{claude_session_id}/events") as events_resp:
-                    if events_resp.status != 200:
-                        error_text = await events_resp.text()
-                        logger.error(f"Failed to get Claude events: {events_resp.status}, {error_text}")
-                        yield f"data: Error: Failed to get Claude response\n\n"
-                        yield "data: [DONE]\n\n"
-                        return
-
-                    # Read the SSE stream and forward it
-                    accumulated_response = []
-                    logger.info(f"[CLAUDE STREAM] Starting to read Claude events stream for chat {chat_uuid}...")
-                    async for line in events_resp.content:
-                        line_str = line.decode("utf-8")
-                        logger.debug(f"[CLAUDE STREAM] Raw line received: {repr(line_str)}")
-
-                        if line_str.startswith("data:"):
-                            # Process the SSE data
-                            data_content = line_str[5:].strip()  # Remove "data:" prefix
-                            logger.debug(f"[CLAUDE STREAM] Data content: {repr(data_content)}")
-
-                            if data_content == "[DONE]":
-                                logger.info(f"[CLAUDE STREAM] Received DONE signal for chat {chat_uuid}")
-                                break
-                            elif data_content and data_content != "":
-                                # Parse the JSON message
-                                import json
-                                try:
-                                    message_data = json.loads(data_content)
-                                    logger.debug(f"[CLAUDE STREAM] Parsed JSON: {type(message_data)}, keys: {list(message_data.keys()) if isinstance(message_data, dict) else "N/A"}")
-
-                                    # Extract text content from Claude"s response based on message type
-                                    if isinstance(message_data, dict):
-                                        # Handle different Claude message types based on the SDK documentation
-
-                                        # Check if it"s an AssistantMessage (has "content" as list of ContentBlocks)
-                                        if "content" in message_data and isinstance(message_data["content"], list):
-                                            # This is likely an AssistantMessage with content blocks
-                                            content_blocks = message_data["content"]
-                                            logger.debug(f"[CLAUDE STREAM] Processing AssistantMessage with {len(content_blocks)} content blocks")
-
-                                            for block in content_blocks:
-                                                logger.debug(f"[CLAUDE STREAM] Processing content block: {type(block)}, value: {repr(block)}")
-                                                if isinstance(block, dict):
-                                                    # Handle different content block types
-                                                    block_type = block.get("type", "unknown")
-                                                    if "text" in block:
-                                                        # This could be a TextBlock
-                                                        text_content = block["text"]
-                                                        if isinstance(text_content, str):
-                                                            accumulated_response.append(text_content)
-                                                            # Yield the accumulated response
-                                                            current_response = " ".join(accumulated_response)
-                                                            logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                            yield f"data: {current_response}\n\n"
-                                                    elif block_type == "text" and "text" in block:
-                                                        # Explicit text block
-                                                        text_content = block["text"]
-                                                        accumulated_response.append(text_content)
-                                                        # Yield the accumulated response
-                                                        current_response = " ".join(accumulated_response)
-                                                        logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                        yield f"data: {current_response}\n\n"
-                                                    elif block_type == "tool_use":
-                                                        # Tool use block
-                                                        tool_name = block.get("name", "unknown")
-                                                        tool_input = block.get("input", {})
-                                                        tool_text = f"[Using tool: {tool_name} with input: {tool_input}]"
-                                                        accumulated_response.append(tool_text)
-                                                        # Yield the accumulated response
-                                                        current_response = " ".join(accumulated_response)
-                                                        logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                        yield f"data: {current_response}\n\n"
-                                                    elif block_type == "tool_result":
-                                                        # Tool result block
-                                                        tool_result = block.get("content", "Tool completed")
-                                                        result_text = str(tool_result)
-                                                        accumulated_response.append(result_text)
-                                                        # Yield the accumulated response
-                                                        current_response = " ".join(accumulated_response)
-                                                        logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                        yield f"data: {current_response}\n\n"
-                                                    elif block_type == "thinking":
-                                                        # Thinking block
-                                                        thinking = block.get("thinking", "")
-                                                        thinking_text = f"[Thinking: {thinking}]"
-                                                        accumulated_response.append(thinking_text)
-                                                        # Yield the accumulated response
-                                                        current_response = " ".join(accumulated_response)
-                                                        logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                        yield f"data: {current_response}\n\n"
-                                                    else:
-                                                        # Unknown block type, try to extract any text
-                                                        logger.debug(f"[CLAUDE STREAM] Unknown block type: {block_type}, trying to extract text")
-                                                        for key, value in block.items():
-                                                            if key == "text" and isinstance(value, str):
-                                                                accumulated_response.append(value)
-                                                                # Yield the accumulated response
-                                                                current_response = " ".join(accumulated_response)
-                                                                logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                                yield f"data: {current_response}\n\n"
-                                        elif message_data.get("subtype") in ["success", "error"]:
-                                            # This is a ResultMessage, contains final result
-                                            result_text = message_data.get("result", "")
-                                            if result_text:
-                                                accumulated_response.append(result_text)
-                                                # Yield the accumulated response
-                                                current_response = " ".join(accumulated_response)
-                                                logger.info(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                yield f"data: {current_response}\n\n"
-                                            logger.info(f"[CLAUDE STREAM] Final message received with subtype: {message_data["subtype"]} for chat {chat_uuid}")
-                                            break
-                                        elif "message" in message_data and isinstance(message_data["message"], str):
-                                            # This might be a system or error message
-                                            message_text = message_data["message"]
-                                            accumulated_response.append(message_text)
-                                            # Yield the accumulated response
-                                            current_response = " ".join(accumulated_response)
-                                            logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                            yield f"data: {current_response}\n\n"
-                                        else:
-                                            # Try to find text content in any field
-                                            logger.debug(f"[CLAUDE STREAM] Unknown message type, searching for text content in: {message_data}")
-                                            for key, value in message_data.items():
-                                                if isinstance(value, str) and key in ["text", "content", "message", "result"]:
-                                                    accumulated_response.append(value)
-                                                    # Yield the accumulated response
-                                                    current_response = " ".join(accumulated_response)
-                                                    logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                                    yield f"data: {current_response}\n\n"
-                                    else:
-                                        # If it"s not a dict, just yield it as string
-                                        message_str = str(message_data)
-                                        accumulated_response.append(message_str)
-                                        # Yield the accumulated response
-                                        current_response = " ".join(accumulated_response)
-                                        logger.debug(f"[CLAUDE STREAM] Yielding accumulated response: {repr(current_response)}")
-                                        yield f"data: {current_response}\n\n"
-                                except json.JSONDecodeError as e:
-                                    # If not JSON, just yield the raw content
-                                    logger.error(f"[CLAUDE STREAM] JSON decode error: {e}, raw content: {repr(data_content)}")
-                                    if data_content.strip() != "":
-                                        accumulated_response.append(data_content)
-                                        # Yield the accumulated response
-                                        current_response = " ".join(accumulated_response)
-                                        yield f"data: {current_response}\n\n"
-                        
-                        # Check for connection issues
-                        if not line_str:
-                            logger.debug(f"[CLAUDE STREAM] Empty line received for chat {chat_uuid}, breaking")
-                            break
-                    logger.info(f"[CLAUDE STREAM] Finished reading Claude events stream for chat {chat_uuid}")
-                    
+            logger.info("[CLAUDE REQUEST] Sending query to Claude session %s for chat %s", claude_session_id, chat_uuid)
+            logger.info("[CLAUDE REQUEST] Input prompt: %s", request.message)
+
+            # Send the query straight to the session's Claude client
+            _last_activity[claude_session_id] = time.time()
+            await session_data.client.query(request.message)
+            logger.info("Query sent successfully to Claude session %s", claude_session_id)
+
+            # Stream the response from the session's message iterator
+            logger.info("[CLAUDE STREAM] Starting to read Claude messages for chat %s...", chat_uuid)
+            async for message in _iter_session_events(session_data):
+                if debug:
+                    logger.debug("[CLAUDE STREAM] Received message: %r", message)
+
+                # Extract text content from Claude's response based on message type
+                if isinstance(message, AssistantMessage):
+                    for block in message.content:
+                        handler = BLOCK_HANDLERS.get(type(block))
+                        fragment = handler(block) if handler else None
+                        if fragment:
+                            if debug:
+                                logger.debug("[CLAUDE STREAM] Yielding delta: %r", fragment)
+                            yield _sse_delta(response_buf, fragment)
+                elif isinstance(message, ResultMessage):
+                    # This is a ResultMessage, contains final result
+                    if message.result:
+                        if debug:
+                            logger.debug("[CLAUDE STREAM] Yielding delta: %r", message.result)
+                        yield _sse_delta(response_buf, message.result)
+                    logger.info("[CLAUDE STREAM] Final message received with subtype: %s for chat %s", message.subtype, chat_uuid)
+            logger.info("[CLAUDE STREAM] Finished reading Claude messages for chat %s", chat_uuid)
+
         except Exception as e:
-            logger.error(f"Error in Claude stream for chat {chat_uuid}: {e}")
-            yield f"data: Error: {str(e)}\n\n"
-        
+            logger.error("Error in Claude stream for chat %s: %s", chat_uuid, e)
+            # Framed like a delta so the client appends it cleanly, but kept out of the saved reply
+            error = (b" " if response_buf else b"") + f"Error: {e}".encode()
+            yield SSE_PREFIX + error.replace(b"\n", b"\\n") + SSE_SUFFIX
+
         # Store the complete response
-        complete_response = " ".join(accumulated_response) if accumulated_response else "No response from Claude"
-        logger.info(f"[CLAUDE RESPONSE] Complete response for chat {chat_uuid}: {repr(complete_response[:100])}...")
+        complete_response = response_buf.decode() if response_buf else "No response from Claude"
+        logger.info("[CLAUDE RESPONSE] Complete response for chat %s: %r...", chat_uuid, complete_response[:100])
         
         # Save assistant"s response to database
-        db.add_message(chat_uuid, "assistant", complete_response.strip())
-        logger.info(f"[CHAT {chat_uuid}] Claude response saved to database")
+        _db_write(db.add_message, chat_uuid, "assistant", complete_response.strip())
+        logger.info("[CHAT %s] Claude response queued for saving", chat_uuid)
 
-        yield "data: [DONE]\n\n"
+        yield SSE_DONE
 
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+    return _sse_response(_coalesce_deltas(generate_stream()))
 
 
 @app.delete("/api/chat/{chat_uuid}")
@@ -605,12 +717,12 @@ async def delete_chat(chat_uuid: str):
     Delete a chat session
     """
     try:
-        chat = db.get_chat(chat_uuid)
-        if not chat:
+        if not await _db(db.delete_chat, chat_uuid):
             raise HTTPException(status_code=404, detail="Chat not found")
 
-        db.delete_chat(chat_uuid)
-        return JSONResponse({"message": "Chat deleted successfully"})
+        return _json_response({"message": "Chat deleted successfully"})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -639,56 +751,108 @@ TOOL_PROFILES = {
     }
 }
 
-@app.post("/sessions")
-async def create_session(request: CreateSessionRequest) -> CreateSessionResponse:
+async def _create_session(request: CreateSessionRequest) -> tuple[str, SessionData]:
     """
-    Create a Claude session
+    Connect a new ClaudeSDKClient for the request and register it in the session store
     """
-    try:
-        # Validate request parameters
-        if request.profile and request.profile not in TOOL_PROFILES:
-            raise HTTPException(status_code=400, detail=f"Invalid profile: {request.profile}. Valid profiles: {list(TOOL_PROFILES.keys())}")
-
-        # Get tool profile configuration
-        profile_config = TOOL_PROFILES.get(request.profile, TOOL_PROFILES["default"])
-
-        # Build options from request and profile
-        options = ClaudeAgentOptions(
-            # allowed_tools=request.allowed_tools or profile_config["allowed_tools"],
-            # system_prompt=request.system_prompt,
-            # permission_mode=request.permission_mode or profile_config["permission_mode"],
-            permission_mode="bypassPermissions",
-            model=request.model,
-            cwd=request.cwd
-        )
+    # Validate request parameters
+    if request.profile and request.profile not in TOOL_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Invalid profile: {request.profile}. Valid profiles: {list(TOOL_PROFILES.keys())}")
+
+    # Get tool profile configuration
+    profile_config = TOOL_PROFILES.get(request.profile, TOOL_PROFILES["default"])
 
-        # Add sandbox settings if needed
-        if request.profile == "sandboxed" or profile_config.get("sandbox"):
-            from claude_agent_sdk import SandboxSettings
-            sandbox_settings: SandboxSettings = profile_config.get("sandbox", {"enabled": True})
-            options.sandbox = sandbox_settings
+    # Build options from request and profile
+    options = ClaudeAgentOptions(
+        # allowed_tools=request.allowed_tools or profile_config["allowed_tools"],
+        # system_prompt=request.system_prompt,
+        # permission_mode=request.permission_mode or profile_config["permission_mode"],
+        permission_mode="bypassPermissions",
+        model=request.model,
+        cwd=request.cwd
+    )
 
-        # Create ClaudeSDKClient
-        client = ClaudeSDKClient(options)
+    # Add sandbox settings if needed
+    if request.profile == "sandboxed" or profile_config.get("sandbox"):
+        from claude_agent_sdk import SandboxSettings
+        sandbox_settings: SandboxSettings = profile_config.get("sandbox", {"enabled": True})
+        options.sandbox = sandbox_settings
 
-        # Connect to Claude (with optional initial prompt)
+    # Create ClaudeSDKClient
+    client = ClaudeSDKClient(options)
+
+    # Connect to Claude (with optional initial prompt)
+    async with _session_create_sem:
         await client.connect()
 
-        # Generate session ID
-        session_id = str(uuid.uuid4())
+    # Generate session ID
+    session_id = str(uuid.uuid4())
+
+    # Store session data (timestamps are epoch seconds, formatted only when reported)
+    now = time.time()
+    session_data = SessionData(
+        client=client,
+        options=options,
+        created_at=now
+    )
+    session_store[session_id] = session_data
+    _last_activity[session_id] = now
+    return session_id, session_data
+
+
+def _encode_sdk_obj(obj):
+    """
+    orjson fallback for values it can't encode natively (SDK dataclasses, dicts and lists are handled in C)
+    """
+    if hasattr(obj, '__dict__'):
+        return obj.__dict__
+    return str(obj)
+
+
+def _dump_message(message) -> bytes:
+    """
+    Serialize a Claude SDK message to JSON bytes in a single orjson pass
+    """
+    return orjson.dumps(message, default=_encode_sdk_obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def _iter_session_events(session_data: SessionData):
+    """
+    Yield a session's Claude SDK messages as they arrive, stopping after the final ResultMessage
+    """
+    async for message in session_data.client.receive_messages():
+        yield message
+
+        # Check if this is a final ResultMessage
+        if hasattr(message, 'subtype') and message.subtype in ['success', 'error']:
+            break
 
-        # Store session data
-        session_data = SessionData(
-            client=client,
-            options=options,
-            created_at=datetime.now()
-        )
-        session_store[session_id] = session_data
+
+def _get_session(session_id: str) -> SessionData:
+    """
+    Look up a session, raising 400 for a malformed ID and 404 for an unknown one
+    """
+    if not _UUID_RE.match(session_id):
+        raise HTTPException(status_code=400, detail="Invalid session ID format")
+
+    session_data = session_store.get(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session_data
+
+
+@app.post("/sessions")
+async def create_session(request: CreateSessionRequest) -> CreateSessionResponse:
+    """
+    Create a Claude session
+    """
+    try:
+        session_id, session_data = await _create_session(request)
 
         return CreateSessionResponse(
             session_id=session_id,
             model=request.model,
-            created_at=session_data.created_at.isoformat(),
+            created_at=datetime.fromtimestamp(session_data.created_at).isoformat(),
             status="ready"
         )
     except HTTPException:
@@ -703,18 +867,8 @@ async def query_session(session_id: str, request: QueryRequest):
     """
     Send a user message to a Claude session
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
-    session_data.last_activity = datetime.now()
+    session_data = _get_session(session_id)
+    _last_activity[session_id] = time.time()
 
     try:
         # Validate prompt
@@ -726,7 +880,7 @@ async def query_session(session_id: str, request: QueryRequest):
 
         # For now, return a 202 Accepted status
         # The actual response will be streamed via the events endpoint
-        return {"status": "accepted", "session_id": session_id}
+        return _json_response({"status": "accepted", "session_id": session_id})
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -739,68 +893,23 @@ async def stream_session_events(session_id: str):
     """
     Stream Claude's response as Server-Sent Events (SSE)
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
-    session_data.last_activity = datetime.now()
+    session_data = _get_session(session_id)
+    _last_activity[session_id] = time.time()
 
     async def event_generator():
         try:
-            # Receive messages from Claude
-            async for message in session_data.client.receive_messages():
-                # Convert message to JSON and send as SSE event
-                import json
-
-                def serialize_message(obj):
-                    """Recursively serialize Claude SDK message objects to JSON-compatible format."""
-                    if hasattr(obj, '__dict__'):
-                        # Handle dataclass instances like AssistantMessage, TextBlock, etc.
-                        result = {}
-                        for key, value in obj.__dict__.items():
-                            result[key] = serialize_message(value)
-                        return result
-                    elif hasattr(obj, '__dataclass_fields__'):
-                        # For dataclass instances
-                        result = {}
-                        for field in obj.__dataclass_fields__:
-                            result[field] = serialize_message(getattr(obj, field))
-                        return result
-                    elif isinstance(obj, list):
-                        # Handle lists of objects
-                        return [serialize_message(item) for item in obj]
-                    elif isinstance(obj, dict):
-                        # Handle dictionaries
-                        return {key: serialize_message(value) for key, value in obj.items()}
-                    else:
-                        # For primitive types or string representations
-                        return obj if obj is None or isinstance(obj, (str, int, float, bool)) else str(obj)
-
-                message_dict = serialize_message(message)
-
-                # Send the message as an SSE event
-                yield f"data: {json.dumps(message_dict)}\n\n"
-
-                # Check if this is a final ResultMessage
-                if hasattr(message, 'subtype') and message.subtype in ['success', 'error']:
-                    break
+            # Receive messages from Claude and send each one as an SSE event
+            async for message in _iter_session_events(session_data):
+                yield SSE_PREFIX + _dump_message(message) + SSE_SUFFIX
         except asyncio.CancelledError:
             # Client disconnected
             pass
         except Exception as e:
             # Send error message
-            import json
             error_msg = {"type": "error", "message": str(e)}
-            yield f"data: {json.dumps(error_msg)}\n\n"
+            yield SSE_PREFIX + orjson.dumps(error_msg) + SSE_SUFFIX
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    return _sse_response(event_generator())
 
 
 @app.post("/sessions/{session_id}/interrupt")
@@ -808,24 +917,14 @@ async def interrupt_session(session_id: str, request: InterruptRequest):
     """
     Stop current agent run in a Claude session
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
-    session_data.last_activity = datetime.now()
+    session_data = _get_session(session_id)
+    _last_activity[session_id] = time.time()
 
     try:
         # Call Claude's interrupt method
         await session_data.client.interrupt()
 
-        return {"status": "interrupted", "session_id": session_id}
+        return _json_response({"status": "interrupted", "session_id": session_id})
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -838,18 +937,8 @@ async def reset_session(session_id: str, request: ResetRequest):
     """
     Reset conversation in a Claude session
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
-    session_data.last_activity = datetime.now()
+    session_data = _get_session(session_id)
+    _last_activity[session_id] = time.time()
 
     try:
         if request.hard_reset:
@@ -875,7 +964,7 @@ async def reset_session(session_id: str, request: ResetRequest):
                 pass
             await session_data.client.connect()
 
-        return {"status": "reset", "session_id": session_id, "reset_type": "hard" if request.hard_reset else "soft"}
+        return _json_response({"status": "reset", "session_id": session_id, "reset_type": "hard" if request.hard_reset else "soft"})
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -888,17 +977,7 @@ async def delete_session(session_id: str):
     """
     Destroy a Claude session
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
+    session_data = _get_session(session_id)
 
     try:
         # Disconnect the Claude client
@@ -910,8 +989,9 @@ async def delete_session(session_id: str):
 
         # Remove session from store
         del session_store[session_id]
+        _last_activity.pop(session_id, None)
 
-        return {"status": "deleted", "session_id": session_id}
+        return _json_response({"status": "deleted", "session_id": session_id})
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -924,29 +1004,20 @@ async def get_session(session_id: str):
     """
     Get session information
     """
-    # Validate session ID format
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    if session_id not in session_store:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session_data = session_store[session_id]
+    session_data = _get_session(session_id)
 
-    return {
+    return _json_response({
         "session_id": session_id,
         "status": session_data.status,
-        "created_at": session_data.created_at.isoformat(),
-        "last_activity": session_data.last_activity.isoformat(),
+        "created_at": datetime.fromtimestamp(session_data.created_at).isoformat(),
+        "last_activity": datetime.fromtimestamp(_last_activity[session_id]).isoformat(),
         "model": session_data.options.model,
         "allowed_tools": session_data.options.allowed_tools,
         "permission_mode": session_data.options.permission_mode
-    }
+    })
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # "auto" picks uvloop/httptools when uvicorn[standard] is installed; one process, since sessions are in memory
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")
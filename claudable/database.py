@@ -1,19 +1,28 @@
 import sqlite3
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 
 class ChatDatabase:
     def __init__(self, db_path: str = "chats.db"):
         self.db_path = db_path
+        self._local = threading.local()
         self.init_db()
 
     def get_connection(self):
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get this thread's database connection, opening and tuning it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            # WAL (set in init_db) is crash-safe with NORMAL sync and lets readers run beside a writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
         return conn
 
     def init_db(self):
@@ -21,6 +30,9 @@ class ChatDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
 
+        # Write-ahead logging is persistent in the database file
+        cursor.execute("PRAGMA journal_mode=WAL")
+
         # Create chats table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS chats (
@@ -57,7 +69,6 @@ class ChatDatabase:
         """)
 
         conn.commit()
-        conn.close()
 
     def create_chat(self, title: Optional[str] = None) -> str:
         """Create a new chat session and return its UUID"""
@@ -65,13 +76,16 @@ class ChatDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            "INSERT INTO chats (uuid, title) VALUES (?, ?)",
-            (chat_uuid, title or "New Chat")
-        )
+        try:
+            cursor.execute(
+                "INSERT INTO chats (uuid, title) VALUES (?, ?)",
+                (chat_uuid, title or "New Chat")
+            )
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise e
         return chat_uuid
 
     def get_chat(self, chat_uuid: str) -> Optional[Dict]:
@@ -85,12 +99,44 @@ class ChatDatabase:
         )
 
         row = cursor.fetchone()
-        conn.close()
 
         if row:
             return dict(row)
         return None
 
+    def chat_exists(self, chat_uuid: str) -> bool:
+        """Check whether a chat exists without loading its row"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT 1 FROM chats WHERE uuid = ? LIMIT 1",
+            (chat_uuid,)
+        )
+
+        return cursor.fetchone() is not None
+
+    def get_chat_with_messages(self, chat_uuid: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        """Get a chat and all its messages in one call, or None if the chat doesn't exist"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT * FROM chats WHERE uuid = ?",
+            (chat_uuid,)
+        )
+
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        cursor.execute(
+            "SELECT * FROM messages WHERE chat_uuid = ? ORDER BY created_at ASC",
+            (chat_uuid,)
+        )
+
+        return dict(row), [dict(message) for message in cursor.fetchall()]
+
     def get_all_chats(self) -> List[Dict]:
         """Get all chats ordered by updated_at DESC"""
         conn = self.get_connection()
@@ -101,7 +147,6 @@ class ChatDatabase:
         )
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [dict(row) for row in rows]
 
@@ -110,13 +155,16 @@ class ChatDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            "UPDATE chats SET title = ?, updated_at = CURRENT_TIMESTAMP WHERE uuid = ?",
-            (title, chat_uuid)
-        )
+        try:
+            cursor.execute(
+                "UPDATE chats SET title = ?, updated_at = CURRENT_TIMESTAMP WHERE uuid = ?",
+                (title, chat_uuid)
+            )
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise e
 
     def add_message(self, chat_uuid: str, role: str, content: str):
         """Add a message to a chat"""
@@ -139,8 +187,6 @@ class ChatDatabase:
         except sqlite3.Error as e:
             conn.rollback()
             raise e
-        finally:
-            conn.close()
 
     def get_messages(self, chat_uuid: str) -> List[Dict]:
         """Get all messages for a chat"""
@@ -153,7 +199,6 @@ class ChatDatabase:
         )
 
         rows = cursor.fetchall()
-        conn.close()
 
         return [dict(row) for row in rows]
 
@@ -168,7 +213,6 @@ class ChatDatabase:
         )
 
         row = cursor.fetchone()
-        conn.close()
 
         if row:
             return row['claude_session_id']
@@ -179,24 +223,33 @@ class ChatDatabase:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute(
-            "UPDATE chats SET claude_session_id = ? WHERE uuid = ?",
-            (session_id, chat_uuid)
-        )
+        try:
+            cursor.execute(
+                "UPDATE chats SET claude_session_id = ? WHERE uuid = ?",
+                (session_id, chat_uuid)
+            )
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise e
 
-    def delete_chat(self, chat_uuid: str):
-        """Delete a chat and all its messages"""
+    def delete_chat(self, chat_uuid: str) -> bool:
+        """Delete a chat and all its messages; returns False if the chat didn't exist"""
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM messages WHERE chat_uuid = ?", (chat_uuid,))
-        cursor.execute("DELETE FROM chats WHERE uuid = ?", (chat_uuid,))
+        try:
+            cursor.execute("DELETE FROM messages WHERE chat_uuid = ?", (chat_uuid,))
+            cursor.execute("DELETE FROM chats WHERE uuid = ?", (chat_uuid,))
+            deleted = cursor.rowcount > 0
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+            return deleted
+        except sqlite3.Error as e:
+            # The connection is reused, so never leave a half-applied delete pending
+            conn.rollback()
+            raise e
 
     def generate_title_from_message(self, message: str, max_length: int = 50) -> str:
         """Generate a chat title from the first message"""
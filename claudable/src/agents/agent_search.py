@@ -11,7 +11,7 @@ Flow:
 import asyncio
 import sqlite3
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 
 from src.ai import agent,LM
@@ -27,6 +27,27 @@ logger = get_logger(__name__,level='DEBUG')
 # Configuration
 MAX_SEARCH_RESULTS = 4
 DB_PATH = "search_cache.db"
+LM_API_BASE = "http://192.168.170.76:8000"
+
+# Shared LM client so every search reuses one pooled HTTP session
+_lm: Optional[LM] = None
+
+
+async def _shared_lm() -> LM:
+    """Return the process-wide LM, starting its HTTP session on first use"""
+    global _lm
+    if _lm is None:
+        _lm = LM(model="vllm:", api_base=LM_API_BASE)
+    await _lm.start()  # No-op while the session is open
+    return _lm
+
+
+async def close_lm():
+    """Close the shared LM's HTTP session, if one was started"""
+    global _lm
+    if _lm is not None:
+        await _lm.close()
+        _lm = None
 
 
 # =============================================================================
@@ -339,9 +360,8 @@ async def search_agent(query: str, max_results: int = MAX_SEARCH_RESULTS) -> str
     # Initialize database
     init_db()
 
-    # Initialize LM
-    lm = LM(model="vllm:", api_base="http://192.168.170.76:8000")
-    await lm.start()  # Start the LM session
+    # Reuse the shared LM (and its connection pool)
+    lm = await _shared_lm()
 
     search_query = await scout_agent(query,lm,[async_web_search])
 
@@ -493,9 +513,6 @@ async def search_agent(query: str, max_results: int = MAX_SEARCH_RESULTS) -> str
     print("🔮 Synthesizing final answer...")
     final_answer = await final_answer_agent(doc_analyses, query, lm)
 
-    # Cleanup: close LM session
-    await lm.close()
-
     print("✓ Search agent complete!")
     return final_answer
 
@@ -517,6 +534,8 @@ async def main(query: str, max_results: int):
     print(result)
     print("=" * 80)
 
+    await close_lm()
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -1,9 +1,9 @@
-import json
 import asyncio
 
 from dataclasses import dataclass, field
 from typing import Callable, Optional
 import aiohttp
+import orjson
 from transformers.utils import get_json_schema
 
 
@@ -341,6 +341,9 @@ LM Input paramas
 }
 """
 
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
 class LM:
     def __init__(
         self,
@@ -367,7 +370,14 @@ class LM:
     async def start(self):
         """Initialize shared HTTP session."""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self._timeout)
+            self._session = aiohttp.ClientSession(
+                timeout=self._timeout,
+                connector=aiohttp.TCPConnector(
+                    limit=256,             # concurrent requests across agents
+                    ttl_dns_cache=300,     # skip repeated DNS lookups
+                    keepalive_timeout=60,  # keep connections warm between calls
+                ),
+            )
 
     async def close(self):
         """Close shared HTTP session."""
@@ -402,18 +412,22 @@ class LM:
         try:
             async with session.post(
                 f"{self.api_base}/v1/chat/completions",
-                json=body,
+                data=orjson.dumps(body),
+                headers=JSON_HEADERS,
             ) as resp:
                 resp.raise_for_status()
 
-                async for line in resp.content:
-                    line = line.decode().strip()
-
-                    if not line or line == "data: [DONE]":
-                        continue
+                # Read one SSE event (terminated by a blank line) at a time and
+                # hand its data lines to orjson as raw bytes, without decoding
+                reader = resp.content
+                while True:
+                    frame = await reader.readuntil(b"\n\n")
+                    if not frame:
+                        break
 
-                    if line.startswith("data: "):
-                        yield json.loads(line[6:])
+                    for line in frame.splitlines():
+                        if line.startswith(b"data: ") and line != b"data: [DONE]":
+                            yield orjson.loads(memoryview(line)[6:])
 
         except asyncio.CancelledError:
             # Client disconnected / request cancelled
@@ -437,9 +451,10 @@ class LM:
 
             async with session.post(
                 f"{self.api_base}/v1/chat/completions",
-                json=body,
+                data=orjson.dumps(body),
+                headers=JSON_HEADERS,
             ) as resp:
-                data = await resp.json()
+                data = await resp.json(loads=orjson.loads)
                 if resp.status >= 400:
                     raise RuntimeError(f"LLM error: {data}")
                 return data
@@ -481,7 +496,7 @@ async def _execute_tool(
     """Execute a single tool asynchronously"""
     try:
         # Parse arguments
-        tool_args = json.loads(tool_args_str) if tool_args_str else {}
+        tool_args = orjson.loads(tool_args_str) if tool_args_str else {}
 
         # Get tool function
         if tool_name not in tool_registry:
@@ -262,17 +262,33 @@ class WebSearchTool:
 
 # Global browser instance for reuse
 _browser_instance = None
+# Guards creation so concurrent first searches launch a single browser
+_browser_lock = asyncio.Lock()
+# The shared browser has one page, so searches take turns navigating it
+_page_lock = asyncio.Lock()
 
 
 async def _get_browser():
     """Get or create browser instance"""
     global _browser_instance
     if _browser_instance is None:
-        _browser_instance = PlaywrightBrowser()
-        await _browser_instance.initialize()
+        async with _browser_lock:
+            if _browser_instance is None:
+                browser = PlaywrightBrowser()
+                await browser.initialize()
+                _browser_instance = browser
     return _browser_instance
 
 
+async def close_browser():
+    """Shut down the shared browser instance, if one was started"""
+    global _browser_instance
+    async with _browser_lock:
+        if _browser_instance is not None:
+            await _browser_instance.cleanup()
+            _browser_instance = None
+
+
 def search_web(query: str, max_results: int = 5) -> str:
     """Async wrapper for playwright web search - synchronous interface"""
 
@@ -296,7 +312,8 @@ async def async_web_search(query: str, max_results: int = 5):
     """
     browser = await _get_browser()
     search_tool = WebSearchTool(browser)
-    return await search_tool.web_search(query, 'bing', max_results)
+    async with _page_lock:
+        return await search_tool.web_search(query, 'bing', max_results)
 
 
 # Create FastMCP server
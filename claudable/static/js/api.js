@@ -39,7 +39,8 @@ class ClaudeAPI {
                         return;
                     }
                     if (onChunk) {
-                        onChunk(data);
+                        // Frames carry newlines escaped so they stay on one data: line
+                        onChunk(data.replace(/\\n/g, '\n'));
                     }
                 }
             }
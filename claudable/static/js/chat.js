@@ -238,14 +238,18 @@ class ChatController {
             // Stream the response
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffer = '';
+            let pending = '';
 
             while (true) {
                 const { done, value } = await reader.read();
 
                 if (done) break;
 
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\n');
+                // Keep any partial line until the rest of it arrives
+                pending += decoder.decode(value, { stream: true });
+                const lines = pending.split('\n');
+                pending = lines.pop();
 
                 for (const line of lines) {
                     if (line.startsWith('data: ')) {
@@ -254,19 +258,18 @@ class ChatController {
                             break;
                         }
                         if (data !== '') {
-                            // Unescape newlines from SSE format
-                            const unescapedData = data.replace(/\\n/g, '\n');
-                            // Data already contains the full accumulated buffer from API
-                            // Just render it as markdown
+                            // Each frame is a delta: unescape newlines and append it to the buffer
+                            buffer += data.replace(/\\n/g, '\n');
+                            // Render the accumulated buffer as markdown
                             try {
-                                const html = marked.parse(unescapedData);
+                                const html = marked.parse(buffer);
                                 assistantContent.innerHTML = html;
                                 assistantContent.querySelectorAll('pre code').forEach((block) => {
                                     hljs.highlightElement(block);
                                 });
                             } catch (err) {
                                 // If parsing fails, show as plain text
-                                assistantContent.textContent = unescapedData;
+                                assistantContent.textContent = buffer;
                             }
                             this.scrollToBottom();
                         }
@@ -460,14 +463,18 @@ class ChatController {
             // Stream the response
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffer = '';
+            let pending = '';
 
             while (true) {
                 const { done, value } = await reader.read();
 
                 if (done) break;
 
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\n');
+                // Keep any partial line until the rest of it arrives
+                pending += decoder.decode(value, { stream: true });
+                const lines = pending.split('\n');
+                pending = lines.pop();
 
                 for (const line of lines) {
                     if (line.startsWith('data: ')) {
@@ -476,19 +483,18 @@ class ChatController {
                             break;
                         }
                         if (data !== '') {
-                            // Unescape newlines from SSE format
-                            const unescapedData = data.replace(/\\n/g, '\n');
-                            // Data already contains the full accumulated buffer from API
-                            // Just render it as markdown
+                            // Each frame is a delta: unescape newlines and append it to the buffer
+                            buffer += data.replace(/\\n/g, '\n');
+                            // Render the accumulated buffer as markdown
                             try {
-                                const html = marked.parse(unescapedData);
+                                const html = marked.parse(buffer);
                                 assistantContent.innerHTML = html;
                                 assistantContent.querySelectorAll('pre code').forEach((block) => {
                                     hljs.highlightElement(block);
                                 });
                             } catch (err) {
                                 // If parsing fails, show as plain text
-                                assistantContent.textContent = unescapedData;
+                                assistantContent.textContent = buffer;
                             }
                             this.scrollToBottom();
                         }